@@ -0,0 +1,15 @@
+"""
+Celery app for AstralDraw.
+
+Start a worker with ``celery -A AstralDraw worker``.
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'AstralDraw.settings')
+
+app = Celery('AstralDraw')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
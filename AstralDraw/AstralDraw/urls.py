@@ -8,7 +8,9 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('core.urls')),  # Your app URLs
     #path('accounts/', include('django.contrib.auth.urls')),  # Django auth URLs
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_URL)
+]
 
+# Media and static files are served by the web server outside development
 if settings.DEBUG:
-    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
@@ -1,6 +1,56 @@
+from django import forms
 from django.contrib import admin
+import random
 
 from core.models import UserWallet, Draw, ForgedKey
+
+
+class DrawAdminForm(forms.ModelForm):
+    """
+    star_keys is an encrypted BinaryField, which admin forms leave out, so the
+    winning keys are edited here as plaintext and encrypted by the field on save.
+    """
+    winning_star_keys = forms.CharField(
+        required=False,
+        help_text="Six keys from 0 to 9, comma separated, e.g. 1,2,3,4,5,6. "
+                  "Leave blank to keep the current keys, or to generate them for a new draw.",
+    )
+
+    class Meta:
+        model = Draw
+        fields = '__all__'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.fields['winning_star_keys'].initial = ','.join(map(str, self.instance.get_star_keys()))
+
+    def clean_winning_star_keys(self):
+        value = self.cleaned_data['winning_star_keys'].strip()
+        if not value:
+            return None
+        try:
+            keys = [int(k) for k in value.replace(' ', '').split(',')]
+        except ValueError:
+            raise forms.ValidationError("Keys must be whole numbers separated by commas")
+        if len(keys) != 6 or not all(0 <= k <= 9 for k in keys):
+            raise forms.ValidationError("Enter exactly six keys from 0 to 9")
+        return keys
+
+    def save(self, commit=True):
+        keys = self.cleaned_data.get('winning_star_keys')
+        if keys:
+            self.instance.set_star_keys(keys)
+        elif not self.instance.star_keys:
+            # Same generation as the create_draw endpoint
+            self.instance.set_star_keys([random.randint(0, 9) for _ in range(6)])
+        return super().save(commit)
+
+
+@admin.register(Draw)
+class DrawAdmin(admin.ModelAdmin):
+    form = DrawAdminForm
+
+
 admin.site.register(UserWallet)
-admin.site.register(Draw)
-admin.site.register(ForgedKey)
\ No newline at end of file
+admin.site.register(ForgedKey)
@@ -0,0 +1,244 @@
+"""Redis-backed helpers shared by the views."""
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import check_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Sum
+from django.utils import timezone
+from django_redis import get_redis_connection
+import hashlib
+import logging
+import orjson
+import time
+
+from core.models import Draw, ForgedKey, UserWallet
+
+logger = logging.getLogger(__name__)
+
+# Bloom filter of registered emails (RedisBloom)
+EMAIL_BLOOM_KEY = "users:emails"
+EMAIL_BLOOM_SEEDED_KEY = "users:emails:seeded"
+EMAIL_BLOOM_SEED_LOCK = "users:emails:seeding"
+EMAIL_BLOOM_ERROR_RATE = 0.001
+EMAIL_BLOOM_CAPACITY = 1_000_000
+
+# Login lookups: the columns login() and the views read, keyed by email
+AUTH_USER_CACHE_TIMEOUT = 300
+AUTH_USER_FIELDS = ['id', 'password', 'username', 'first_name', 'is_active']
+
+# Wallet id per user; the lock lets one request fill a cold entry
+WALLET_ID_TIMEOUT = 3600
+WALLET_LOCK_TIMEOUT = 3
+WALLET_LOCK_WAIT = 0.02
+
+# Upper bound on how long a draw's open/closed state is trusted
+CAN_PARTICIPATE_TIMEOUT = 30
+
+# Platform stats hash, rewritten by the refresh_platform_stats beat task.
+# The TTL makes the view recompute if the beat stops running.
+PLATFORM_STATS_KEY = "stats:platform"
+PLATFORM_STATS_ETAG_KEY = "stats:platform:etag"
+PLATFORM_STATS_TIMEOUT = 300
+
+# Rendered landing page and its ETag, dropped by invalidate_platform_caches
+LANDING_PAGE_KEY = "landing_page_data"
+LANDING_ETAG_KEY = "landing_page_etag"
+
+
+def seed_email_bloom():
+    """
+    Load every registered email into the bloom filter, then mark it usable.
+    Runs as the seed_email_bloom_filter task; it scans the whole User table.
+    """
+    conn = get_redis_connection('default')
+    try:
+        conn.execute_command('BF.RESERVE', EMAIL_BLOOM_KEY, EMAIL_BLOOM_ERROR_RATE, EMAIL_BLOOM_CAPACITY)
+    except Exception:
+        pass  # Left over from an earlier, interrupted seed
+
+    batch = []
+    for email in User.objects.exclude(email='').values_list('email', flat=True).iterator(chunk_size=2000):
+        batch.append(email.lower())
+        if len(batch) >= 1000:
+            conn.execute_command('BF.MADD', EMAIL_BLOOM_KEY, *batch)
+            batch = []
+    if batch:
+        conn.execute_command('BF.MADD', EMAIL_BLOOM_KEY, *batch)
+    conn.set(EMAIL_BLOOM_SEEDED_KEY, 1)
+
+
+def email_maybe_registered(email):
+    """
+    False only when the bloom filter proves the email was never registered.
+    A missing or unseeded filter, or any Redis/RedisBloom failure, answers True
+    so the caller falls back to the database.
+    """
+    try:
+        conn = get_redis_connection('default')
+        # BF.EXISTS on a missing filter answers 0, so both keys must be present
+        if conn.exists(EMAIL_BLOOM_KEY, EMAIL_BLOOM_SEEDED_KEY) < 2:
+            # The flag may have outlived an evicted filter; drop it so a reseed
+            # in progress is not trusted before it finishes
+            conn.delete(EMAIL_BLOOM_SEEDED_KEY)
+            if cache.add(EMAIL_BLOOM_SEED_LOCK, 1, 300):
+                from core.tasks import seed_email_bloom_filter  # core.tasks imports this module
+                seed_email_bloom_filter.delay()
+            return True
+        return bool(conn.execute_command('BF.EXISTS', EMAIL_BLOOM_KEY, email))
+    except Exception as e:
+        logger.warning(f"Email bloom filter unavailable: {e}")
+        return True
+
+
+def remember_registered_email(email):
+    """
+    Add a registered email to the bloom filter. NOCREATE leaves a missing
+    filter missing, so only the seed can bring it back, complete.
+    """
+    try:
+        get_redis_connection('default').execute_command(
+            'BF.INSERT', EMAIL_BLOOM_KEY, 'NOCREATE', 'ITEMS', email
+        )
+    except Exception as e:
+        logger.warning(f"Email bloom filter unavailable: {e}")
+
+
+def auth_user_cache_key(email):
+    return f"authuser:{email}"
+
+
+def authenticate_cached(request, email, password):
+    """
+    authenticate() that serves the User row from the cache on repeat logins.
+    The password is still checked against the cached hash; other columns are
+    deferred and load on first access.
+    """
+    key = auth_user_cache_key(email)
+    cached = cache.get(key)
+    if cached is None:
+        user = authenticate(request, username=email, password=password)
+        if user is not None:
+            cache.set(key, {
+                'values': [getattr(user, field) for field in AUTH_USER_FIELDS],
+                'backend': user.backend,
+            }, AUTH_USER_CACHE_TIMEOUT)
+        return user
+
+    fields = dict(zip(AUTH_USER_FIELDS, cached['values']))
+    if not fields['is_active'] or not check_password(password, fields['password']):
+        return None
+    user = User.from_db('default', AUTH_USER_FIELDS, cached['values'])
+    user.backend = cached['backend']
+    return user
+
+
+def get_user_wallet_id(user):
+    """
+    The user's wallet id, cached. When the entry is cold, one concurrent request
+    loads it from the database while the rest wait briefly for it to appear.
+    Raises UserWallet.DoesNotExist.
+    """
+    key = f"user_{user.id}_wallet"
+    wallet_id = cache.get(key)
+    if wallet_id:
+        return wallet_id
+    if not cache.add(f"{key}_lock", 1, WALLET_LOCK_TIMEOUT):
+        time.sleep(WALLET_LOCK_WAIT)
+        wallet_id = cache.get(key)
+        if wallet_id:
+            return wallet_id
+    wallet_id = UserWallet.objects.values_list('id', flat=True).get(user_id=user.id)
+    cache.set(key, wallet_id, WALLET_ID_TIMEOUT)
+    return wallet_id
+
+
+def can_participate_cache_key(draw_id):
+    return f"draw:{draw_id}:can_participate"
+
+
+def draw_accepts_submissions(draw_id):
+    """
+    Cached Draw.can_participate(); a hit skips the draw SELECT entirely.
+    An open draw is never cached past its draw_datetime, so it closes on time.
+    Raises Draw.DoesNotExist for unknown ids.
+    """
+    key = can_participate_cache_key(draw_id)
+    allowed = cache.get(key)
+    if allowed is None:
+        draw = Draw.objects.only('status', 'draw_datetime').get(id=draw_id)
+        allowed = draw.can_participate()
+        timeout = CAN_PARTICIPATE_TIMEOUT
+        if allowed:
+            timeout = min(timeout, (draw.draw_datetime - timezone.now()).total_seconds())
+        if timeout > 0:
+            cache.set(key, allowed, timeout)
+    return allowed
+
+
+def table_row_count(model):
+    """
+    Row count for an unfiltered table. PostgreSQL answers from the planner's
+    reltuples estimate instead of a full visibility scan; other backends count.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] >= 0:  # -1 until the table is first analyzed
+            return row[0]
+    return model.objects.count()
+
+
+def compute_platform_stats():
+    """Aggregate the platform_stats payload from the database."""
+    stats = {
+        'total_draws': table_row_count(Draw),
+        'active_draws': Draw.objects.filter(
+            status__in=[Draw.DrawStatus.UPCOMING, Draw.DrawStatus.ACTIVE]
+        ).count(),
+        'total_prizes': float(Draw.objects.aggregate(Sum('prize_pool'))['prize_pool__sum'] or 0),
+        'total_players': table_row_count(UserWallet),
+        'keys_forged': table_row_count(ForgedKey),
+    }
+
+    # Recent winners with efficient query
+    recent_winners = list(Draw.objects.filter(
+        status=Draw.DrawStatus.ENDED,
+        winner_wallet__isnull=False
+    ).select_related('winner_wallet__user').values(
+        'title', 'prize_pool', 'draw_datetime', 'winner_wallet__user__username'
+    )[:5])
+
+    return {'stats': stats, 'recent_winners': recent_winners}
+
+
+def store_platform_stats():
+    """Recompute the platform stats and write them to the Redis hash."""
+    result = compute_platform_stats()
+    # Decimals are stored as strings, as DjangoJSONEncoder renders them
+    mapping = {field: orjson.dumps(value, default=str) for field, value in result.items()}
+    etag = hashlib.md5(b"".join(mapping[field] for field in sorted(mapping))).hexdigest()
+    pipe = get_redis_connection('default').pipeline()
+    pipe.hset(PLATFORM_STATS_KEY, mapping=mapping)
+    pipe.expire(PLATFORM_STATS_KEY, PLATFORM_STATS_TIMEOUT)
+    pipe.set(PLATFORM_STATS_ETAG_KEY, etag, ex=PLATFORM_STATS_TIMEOUT)
+    pipe.execute()
+    return orjson.loads(orjson.dumps(result, default=str))
+
+
+def platform_stats_etag():
+    """ETag of the stored platform stats, or None when they need rebuilding."""
+    etag = get_redis_connection('default').get(PLATFORM_STATS_ETAG_KEY)
+    return etag.decode() if etag else None
+
+
+def load_platform_stats():
+    """The stored platform stats, or None when the hash is missing."""
+    stored = get_redis_connection('default').hgetall(PLATFORM_STATS_KEY)
+    if not stored:
+        return None
+    return {field.decode(): orjson.loads(value) for field, value in stored.items()}
@@ -0,0 +1,150 @@
+from django.db import models
+from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from dotenv import load_dotenv
+from functools import lru_cache
+import base64
+import os
+
+load_dotenv()
+
+STAR_KEYS_KDF_INFO = b"star_keys"
+
+
+def derive_star_keys_key(secret_key: str) -> bytes:
+    """AES-GCM key for star keys, derived so it is independent of the Fernet key."""
+    return HKDF(
+        algorithm=hashes.SHA256(), length=32, salt=None, info=STAR_KEYS_KDF_INFO
+    ).derive(secret_key.encode())
+
+
+# Build the ciphers once; constructing them per call dominated decrypt cost
+_SECRET_KEY = os.getenv('SECRET_KEY')
+_FERNET = Fernet(base64.urlsafe_b64encode(_SECRET_KEY.encode().ljust(32)[:32])) if _SECRET_KEY else None
+_AESGCM = AESGCM(derive_star_keys_key(_SECRET_KEY)) if _SECRET_KEY else None
+_NONCE_SIZE = 12
+
+
+def fernet_encrypt(data: str) -> str:
+    """Encrypt text using Fernet."""
+    try:
+        if _FERNET is None:
+            raise ValueError("Missing SECRET_KEY in environment variables")
+        return _FERNET.encrypt(data.encode()).decode()
+    except Exception as e:
+        raise ValueError(f"Encryption error: {e}")
+
+
+def fernet_decrypt(token: str) -> str:
+    """Decrypt text using Fernet."""
+    try:
+        if _FERNET is None:
+            raise ValueError("Missing SECRET_KEY in environment variables")
+        return _FERNET.decrypt(token.encode()).decode()
+    except Exception as e:
+        raise ValueError(f"Decryption error: {e}")
+
+
+def aesgcm_encrypt(data: bytes) -> bytes:
+    """Encrypt raw bytes using AES-GCM, returning nonce || ciphertext || tag."""
+    try:
+        if _AESGCM is None:
+            raise ValueError("Missing SECRET_KEY in environment variables")
+        nonce = os.urandom(_NONCE_SIZE)
+        return nonce + _AESGCM.encrypt(nonce, data, None)
+    except Exception as e:
+        raise ValueError(f"Encryption error: {e}")
+
+
+def aesgcm_decrypt(token: bytes) -> bytes:
+    """Decrypt a nonce || ciphertext || tag token using AES-GCM."""
+    try:
+        if _AESGCM is None:
+            raise ValueError("Missing SECRET_KEY in environment variables")
+        return _AESGCM.decrypt(token[:_NONCE_SIZE], token[_NONCE_SIZE:], None)
+    except Exception as e:
+        raise ValueError(f"Decryption error: {e}")
+
+
+@lru_cache(maxsize=4096)
+def decrypt_star_keys(ciphertext: bytes) -> tuple:
+    """Decrypt a star keys ciphertext, memoized since ciphertexts are immutable per row."""
+    try:
+        return tuple(aesgcm_decrypt(ciphertext))
+    except ValueError:
+        return ()
+
+
+class EncryptedFieldMixin:
+    """
+    Encrypt on save and keep the ciphertext on the instance.
+
+    Values loaded from the database are ciphertext; anything else assigned to
+    the attribute is plaintext. Subclasses tell the two apart by type, so a
+    save never needs to inspect the value to avoid double encryption.
+
+    Encryption happens only in pre_save. Raw saves (loaddata) skip pre_save
+    and store the serialized ciphertext as-is; QuerySet.update() and
+    bulk_update() also bypass it and must be given ciphertext.
+    """
+
+    def is_plaintext(self, value) -> bool:
+        raise NotImplementedError
+
+    def encrypt(self, value):
+        raise NotImplementedError
+
+    def pre_save(self, model_instance, add):
+        value = getattr(model_instance, self.attname)
+        if self.is_plaintext(value):
+            value = self.encrypt(value)
+            setattr(model_instance, self.attname, value)
+        return value
+
+
+class Ciphertext(str):
+    """A Fernet token, as opposed to plaintext assigned by application code."""
+
+
+class EncryptedCharField(EncryptedFieldMixin, models.CharField):
+    """CharField holding Fernet-encrypted text."""
+
+    def is_plaintext(self, value) -> bool:
+        return bool(value) and not isinstance(value, Ciphertext)
+
+    def encrypt(self, value):
+        return Ciphertext(fernet_encrypt(str(value)))
+
+    def decrypt(self, value) -> str:
+        if isinstance(value, Ciphertext):
+            return fernet_decrypt(value)
+        return value
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else Ciphertext(value)
+
+
+class EncryptedStarKeysField(EncryptedFieldMixin, models.BinaryField):
+    """
+    BinaryField holding star keys sealed with AES-GCM, one byte per key.
+    Plaintext is a list of ints; ciphertext is bytes.
+    """
+
+    def is_plaintext(self, value) -> bool:
+        return isinstance(value, (list, tuple))
+
+    def encrypt(self, value):
+        return aesgcm_encrypt(bytes(value))
+
+    def decrypt(self, value) -> list:
+        if not value:
+            return []
+        if self.is_plaintext(value):
+            return list(value)
+        return list(decrypt_star_keys(bytes(value)))
+
+    def from_db_value(self, value, expression, connection):
+        # Normalize memoryview so ciphertexts can key the decryption cache
+        return None if value is None else bytes(value)
@@ -0,0 +1,103 @@
+import base64
+import json
+import os
+
+from cryptography.fernet import Fernet, InvalidToken
+from django.db import migrations, models
+
+
+def _fernet():
+    secret_key = os.getenv('SECRET_KEY')
+    if not secret_key:
+        raise ValueError("Missing SECRET_KEY in environment variables")
+    return Fernet(base64.urlsafe_b64encode(secret_key.encode().ljust(32)[:32]))
+
+
+def _convert(f, model, obj):
+    """
+    Re-encrypt a JSON text ciphertext as a one-byte-per-key binary ciphertext.
+    The text column is dropped afterwards, so any row that cannot be converted
+    aborts the migration instead of being lost.
+    """
+    try:
+        keys = json.loads(f.decrypt(obj.star_keys.encode()))
+        return f.encrypt(bytes(keys))
+    except (InvalidToken, ValueError, TypeError) as e:
+        raise ValueError(
+            f"Cannot convert star_keys of {model.__name__} id={obj.pk} "
+            f"(wrong SECRET_KEY or corrupt value): {e!r}"
+        ) from e
+
+
+def forwards(apps, schema_editor):
+    Draw = apps.get_model('core', 'Draw')
+    ForgedKey = apps.get_model('core', 'ForgedKey')
+    if not (Draw.objects.exists() or ForgedKey.objects.exists()):
+        return
+    f = _fernet()
+
+    for model in (Draw, ForgedKey):
+        batch = []
+        for obj in model.objects.exclude(star_keys__isnull=True).exclude(star_keys='').only('id', 'star_keys').iterator(chunk_size=2000):
+            obj.star_keys_bin = _convert(f, model, obj)
+            batch.append(obj)
+            if len(batch) >= 1000:
+                model.objects.bulk_update(batch, ['star_keys_bin'])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, ['star_keys_bin'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_alter_forgedkey_star_keys"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="draw",
+            name="star_keys_bin",
+            field=models.BinaryField(default=b''),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="forgedkey",
+            name="star_keys_bin",
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        # Irreversible: migrating back would recreate empty text columns
+        migrations.RunPython(forwards),
+        migrations.RemoveField(
+            model_name="draw",
+            name="star_keys",
+        ),
+        migrations.RemoveField(
+            model_name="forgedkey",
+            name="star_keys",
+        ),
+        migrations.RenameField(
+            model_name="draw",
+            old_name="star_keys_bin",
+            new_name="star_keys",
+        ),
+        migrations.RenameField(
+            model_name="forgedkey",
+            old_name="star_keys_bin",
+            new_name="star_keys",
+        ),
+        migrations.AlterField(
+            model_name="draw",
+            name="star_keys",
+            field=models.BinaryField(help_text="Winning star keys, one byte per key"),
+        ),
+        migrations.AlterField(
+            model_name="forgedkey",
+            name="star_keys",
+            field=models.BinaryField(
+                blank=True,
+                help_text="User's star keys, one byte per key",
+                null=True,
+            ),
+        ),
+    ]
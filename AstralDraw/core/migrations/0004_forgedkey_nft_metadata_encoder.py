@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-15 01:49
+
+import core.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0003_star_keys_binary"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="forgedkey",
+            name="nft_metadata",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                encoder=core.models.OrjsonEncoder,
+                help_text="NFT metadata storage",
+            ),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-15 01:50
+
+import base64
+import os
+
+from cryptography.fernet import Fernet, InvalidToken
+from django.db import migrations, models
+
+
+def backfill_masks(apps, schema_editor):
+    ForgedKey = apps.get_model("core", "ForgedKey")
+    if not ForgedKey.objects.exclude(star_keys__isnull=True).exists():
+        return
+    secret_key = os.getenv("SECRET_KEY")
+    if not secret_key:
+        raise ValueError("Missing SECRET_KEY in environment variables")
+    f = Fernet(base64.urlsafe_b64encode(secret_key.encode().ljust(32)[:32]))
+
+    batch = []
+    for fk in (
+        ForgedKey.objects.exclude(star_keys__isnull=True)
+        .only("id", "star_keys")
+        .iterator(chunk_size=2000)
+    ):
+        try:
+            keys = f.decrypt(bytes(fk.star_keys))
+        except InvalidToken:
+            continue
+        fk.star_keys_mask = 0
+        for k in keys:
+            fk.star_keys_mask |= 1 << k
+        batch.append(fk)
+        if len(batch) >= 1000:
+            ForgedKey.objects.bulk_update(batch, ["star_keys_mask"])
+            batch = []
+    if batch:
+        ForgedKey.objects.bulk_update(batch, ["star_keys_mask"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0004_forgedkey_nft_metadata_encoder"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="forgedkey",
+            name="star_keys_mask",
+            field=models.BigIntegerField(
+                default=0, help_text="Bitmask of star keys for matching"
+            ),
+        ),
+        migrations.RunPython(backfill_masks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-15 01:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_forgedkey_star_keys_mask"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="forgedkey",
+            index=models.Index(
+                fields=["draw", "star_keys_mask"], name="fk_draw_mask_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,89 @@
+import base64
+import os
+
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from django.db import migrations
+
+NONCE_SIZE = 12
+
+
+def _ciphers():
+    secret_key = os.getenv("SECRET_KEY")
+    if not secret_key:
+        raise ValueError("Missing SECRET_KEY in environment variables")
+    fernet_key = base64.urlsafe_b64encode(secret_key.encode().ljust(32)[:32])
+    # Frozen copy of core.fields.derive_star_keys_key
+    aesgcm_key = HKDF(
+        algorithm=hashes.SHA256(), length=32, salt=None, info=b"star_keys"
+    ).derive(secret_key.encode())
+    return Fernet(fernet_key), AESGCM(aesgcm_key)
+
+
+def _reencrypt(apps, decrypt, encrypt):
+    for name in ("Draw", "ForgedKey"):
+        model = apps.get_model("core", name)
+        rows = model.objects.exclude(star_keys__isnull=True).only("id", "star_keys")
+        batch = []
+        for obj in rows.iterator(chunk_size=2000):
+            token = bytes(obj.star_keys)
+            if not token:
+                continue
+            try:
+                obj.star_keys = encrypt(decrypt(token))
+            except (InvalidToken, InvalidTag, ValueError) as e:
+                # A skipped row would stay in the old format and read back as []
+                raise ValueError(
+                    f"Cannot re-encrypt star_keys of {name} id={obj.pk} "
+                    f"(wrong SECRET_KEY or corrupt value): {e!r}"
+                ) from e
+            batch.append(obj)
+            if len(batch) >= 1000:
+                model.objects.bulk_update(batch, ["star_keys"])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, ["star_keys"])
+
+
+def _has_rows(apps):
+    return any(
+        apps.get_model("core", name).objects.exclude(star_keys__isnull=True).exists()
+        for name in ("Draw", "ForgedKey")
+    )
+
+
+def fernet_to_aesgcm(apps, schema_editor):
+    if not _has_rows(apps):
+        return
+    fernet, aesgcm = _ciphers()
+
+    def encrypt(data):
+        nonce = os.urandom(NONCE_SIZE)
+        return nonce + aesgcm.encrypt(nonce, data, None)
+
+    _reencrypt(apps, fernet.decrypt, encrypt)
+
+
+def aesgcm_to_fernet(apps, schema_editor):
+    if not _has_rows(apps):
+        return
+    fernet, aesgcm = _ciphers()
+
+    def decrypt(token):
+        return aesgcm.decrypt(token[:NONCE_SIZE], token[NONCE_SIZE:], None)
+
+    _reencrypt(apps, decrypt, fernet.encrypt)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_forgedkey_draw_mask_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(fernet_to_aesgcm, aesgcm_to_fernet),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-15 01:53
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_usernames(apps, schema_editor):
+    ForgedKey = apps.get_model("core", "ForgedKey")
+    UserWallet = apps.get_model("core", "UserWallet")
+    ForgedKey.objects.update(
+        username_snapshot=Subquery(
+            UserWallet.objects.filter(id=OuterRef("user_wallet_id")).values(
+                "user__username"
+            )[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_star_keys_aesgcm"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="forgedkey",
+            name="username_snapshot",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                help_text="Owner's username at forge time",
+                max_length=150,
+            ),
+        ),
+        migrations.RunPython(backfill_usernames, migrations.RunPython.noop),
+    ]
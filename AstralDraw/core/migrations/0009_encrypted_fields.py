@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-15 01:54
+
+import core.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_forgedkey_username_snapshot"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="draw",
+            name="star_keys",
+            field=core.fields.EncryptedStarKeysField(
+                help_text="Winning star keys, one byte per key"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="forgedkey",
+            name="star_keys",
+            field=core.fields.EncryptedStarKeysField(
+                blank=True, help_text="User's star keys, one byte per key", null=True
+            ),
+        ),
+        migrations.AlterField(
+            model_name="userwallet",
+            name="private_key",
+            field=core.fields.EncryptedCharField(
+                blank=True, editable=False, max_length=256, null=True
+            ),
+        ),
+    ]
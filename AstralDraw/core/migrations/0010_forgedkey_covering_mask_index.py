@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-15 01:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_encrypted_fields"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="forgedkey",
+            name="fk_draw_mask_idx",
+        ),
+        migrations.AddIndex(
+            model_name="forgedkey",
+            index=models.Index(
+                fields=["draw", "star_keys_mask"],
+                include=("id", "serial_number", "username_snapshot"),
+                name="fk_draw_mask_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-15 02:00
+
+from django.db import migrations
+from django.db.models import Count
+
+
+def check_duplicate_tickets(apps, schema_editor):
+    ForgedKey = apps.get_model("core", "ForgedKey")
+    duplicates = (
+        ForgedKey.objects.values("user_wallet_id", "draw_id")
+        .annotate(n=Count("id"))
+        .filter(n__gt=1)
+        .order_by("draw_id", "user_wallet_id")
+    )
+    problems = []
+    for row in duplicates[:20]:
+        ids = list(
+            ForgedKey.objects.filter(
+                user_wallet_id=row["user_wallet_id"], draw_id=row["draw_id"]
+            ).order_by("id").values_list("id", flat=True)
+        )
+        problems.append(
+            f"draw id={row['draw_id']} user_wallet id={row['user_wallet_id']}: ForgedKey ids={ids}"
+        )
+    if problems:
+        # Which ticket to keep is a business decision, so do not pick one here
+        raise ValueError(
+            "Cannot add unique (user_wallet, draw) to ForgedKey, these wallets "
+            "hold more than one ticket per draw; delete the extras and re-run:\n"
+            + "\n".join(problems)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_forgedkey_covering_mask_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_tickets, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name="forgedkey",
+            name="core_forged_user_wa_163cee_idx",
+        ),
+        migrations.AlterUniqueTogether(
+            name="forgedkey",
+            unique_together={("user_wallet", "draw")},
+        ),
+    ]
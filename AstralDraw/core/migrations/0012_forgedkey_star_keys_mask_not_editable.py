@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-15 02:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0011_forgedkey_one_ticket_per_draw"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="forgedkey",
+            name="star_keys_mask",
+            field=models.BigIntegerField(
+                default=0, editable=False, help_text="Bitmask of star keys for matching"
+            ),
+        ),
+    ]
@@ -0,0 +1,64 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+import logging
+
+from core.caching import auth_user_cache_key, can_participate_cache_key, remember_registered_email
+from core.models import Draw, ForgedKey
+
+logger = logging.getLogger(__name__)
+
+
+def record_ticket_change(draw_id, delta):
+    """
+    Buffer the count change, then drop statistics that include the old count.
+    Runs after the ticket row is committed, so a Redis failure is logged rather
+    than raised into a request that already succeeded.
+    """
+    try:
+        Draw.record_tickets_sold(draw_id, delta)
+        cache.delete(Draw.stats_cache_key(draw_id))
+    except Exception as e:
+        logger.error(f"Could not record ticket change {delta:+d} for draw {draw_id}: {e}")
+
+
+@receiver(post_save, sender=ForgedKey)
+def increment_tickets_sold(sender, instance, created, **kwargs):
+    """Count newly forged keys once their transaction commits."""
+    if created:
+        transaction.on_commit(lambda: record_ticket_change(instance.draw_id, 1))
+    else:
+        cache.delete(Draw.stats_cache_key(instance.draw_id))
+
+
+@receiver(post_delete, sender=ForgedKey)
+def decrement_tickets_sold(sender, instance, **kwargs):
+    """Release the ticket count when a forged key is removed."""
+    transaction.on_commit(lambda: record_ticket_change(instance.draw_id, -1))
+
+
+@receiver(post_save, sender=Draw)
+def invalidate_draw_stats(sender, instance, **kwargs):
+    """Drop cached statistics and open/closed state when a draw is edited."""
+    cache.delete_many([Draw.stats_cache_key(instance.pk), can_participate_cache_key(instance.pk)])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_auth_user(sender, instance, update_fields=None, **kwargs):
+    """Drop the cached login lookup when the user row changes."""
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return  # Written by every login; nothing cached depends on it
+    cache.delete(auth_user_cache_key(instance.username))
+
+
+@receiver(post_save, sender=User)
+def add_registered_email(sender, instance, created, update_fields=None, **kwargs):
+    """Put every account's email in the bloom filter, whichever path created it."""
+    if not instance.email:
+        return
+    if created or update_fields is None or 'email' in update_fields:
+        email = instance.email.lower()
+        transaction.on_commit(lambda: remember_registered_email(email))
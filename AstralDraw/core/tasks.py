@@ -0,0 +1,56 @@
+from celery import shared_task
+from django.core.cache import cache
+import logging
+
+from core.caching import store_platform_stats, seed_email_bloom, LANDING_PAGE_KEY, LANDING_ETAG_KEY
+from core.models import Draw
+
+logger = logging.getLogger(__name__)
+
+PLATFORM_CACHE_KEYS = [LANDING_PAGE_KEY, LANDING_ETAG_KEY]
+
+
+def delay_or_run(task, *args):
+    """
+    Enqueue a task, running it inline if the broker is unreachable. Views call
+    this after their writes are done, so a failure here is logged, not raised.
+    """
+    try:
+        task.delay(*args)
+    except Exception as e:
+        logger.warning(f"Could not enqueue {task.name}, running inline: {e}")
+        try:
+            task(*args)
+        except Exception as e:
+            logger.error(f"{task.name} failed: {e}")
+
+
+@shared_task(ignore_result=True)
+def invalidate_user_caches(user_id):
+    """Drop per-user cache entries after logout."""
+    cache.delete_many([f"user_{user_id}_wallet", f"user_{user_id}_keys"])
+
+
+@shared_task(ignore_result=True)
+def invalidate_platform_caches(*extra_keys):
+    """Drop the platform-wide pages and any draw-specific keys passed in, then rebuild the stats hash."""
+    cache.delete_many(PLATFORM_CACHE_KEYS + list(extra_keys))
+    store_platform_stats()
+
+
+@shared_task(ignore_result=True)
+def refresh_platform_stats():
+    """Beat job: keep the platform stats hash current."""
+    store_platform_stats()
+
+
+@shared_task(ignore_result=True)
+def flush_draw_counts():
+    """Beat job: apply the Redis-buffered ticket sales to Draw rows."""
+    Draw.flush_ticket_counts()
+
+
+@shared_task(ignore_result=True)
+def seed_email_bloom_filter():
+    """Build the registration email bloom filter off the request path."""
+    seed_email_bloom()
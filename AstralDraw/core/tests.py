@@ -1,3 +1,232 @@
-from django.test import TestCase
+from datetime import timedelta
+from importlib import import_module
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+import base64
+import json
+import os
+import tempfile
 
-# Create your tests here.
+from cryptography.fernet import Fernet
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core import serializers
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+from core.fields import Ciphertext
+from core.models import Draw, ForgedKey, UserWallet
+
+migration_0003 = import_module('core.migrations.0003_star_keys_binary')
+migration_0007 = import_module('core.migrations.0007_star_keys_aesgcm')
+
+# Anything not exercising the Redis-only paths runs against a local cache
+LOCAL_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def redis_available():
+    try:
+        return get_redis_connection('default').ping()
+    except Exception:
+        return False
+
+
+def legacy_fernet():
+    """The Fernet cipher the 0003 and 0007 migrations convert from."""
+    return Fernet(base64.urlsafe_b64encode(os.environ['SECRET_KEY'].encode().ljust(32)[:32]))
+
+
+def make_wallet(username, **kwargs):
+    user = User.objects.create_user(username, f'{username}@example.com', 'password')
+    return UserWallet.objects.create(user=user, recipient_id='0.0.1001', **kwargs)
+
+
+def make_draw(**kwargs):
+    kwargs.setdefault('star_keys', [1, 2, 3, 4, 5, 6])
+    return Draw.objects.create(
+        title='Nebula-1',
+        status=Draw.DrawStatus.ACTIVE,
+        draw_datetime=timezone.now() + timedelta(days=1),
+        **kwargs
+    )
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class EncryptedFieldRoundTripTests(TestCase):
+    def setUp(self):
+        self.wallet = make_wallet('alice', private_key='302e0201003005')
+        self.draw = make_draw(star_keys=[9, 0, 4, 4, 7, 1])
+        self.ticket = ForgedKey.objects.create(
+            user_wallet=self.wallet, draw=self.draw,
+            serial_number='AK000100010001', star_keys=[0, 0, 9, 2, 3, 8],
+        )
+
+    def assertDecryptsAsOriginal(self):
+        self.assertEqual(UserWallet.objects.get().decrypt_key(), '302e0201003005')
+        self.assertEqual(Draw.objects.get().get_star_keys(), [9, 0, 4, 4, 7, 1])
+        self.assertEqual(ForgedKey.objects.get().get_star_keys(), [0, 0, 9, 2, 3, 8])
+
+    def test_save_stores_ciphertext(self):
+        stored = UserWallet.objects.values_list('private_key', flat=True).get()
+        self.assertNotIn('302e0201003005', stored)
+        self.assertNotEqual(bytes(Draw.objects.values_list('star_keys', flat=True).get()), bytes([9, 0, 4, 4, 7, 1]))
+        self.assertDecryptsAsOriginal()
+
+    def test_resave_does_not_encrypt_twice(self):
+        for obj in (UserWallet.objects.get(), Draw.objects.get(), ForgedKey.objects.get()):
+            obj.save()
+        self.assertDecryptsAsOriginal()
+
+    def test_assigning_plaintext_reencrypts(self):
+        wallet = UserWallet.objects.get()
+        wallet.private_key = 'rotated'
+        wallet.save()
+        self.assertIsInstance(wallet.private_key, Ciphertext)
+        self.assertEqual(UserWallet.objects.get().decrypt_key(), 'rotated')
+
+    def test_serializer_round_trip(self):
+        data = serializers.serialize('json', [
+            UserWallet.objects.get(), Draw.objects.get(), ForgedKey.objects.get(),
+        ])
+        ForgedKey.objects.all().delete()
+        Draw.objects.all().delete()
+        UserWallet.objects.all().delete()
+        for obj in serializers.deserialize('json', data):
+            obj.save()
+        self.assertDecryptsAsOriginal()
+
+    def test_dumpdata_loaddata_round_trip(self):
+        out = StringIO()
+        call_command('dumpdata', 'auth.user', 'core', stdout=out)
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as fixture:
+            fixture.write(out.getvalue())
+        self.addCleanup(os.remove, fixture.name)
+        ForgedKey.objects.all().delete()
+        Draw.objects.all().delete()
+        User.objects.all().delete()
+        call_command('loaddata', fixture.name, verbosity=0)
+        self.assertDecryptsAsOriginal()
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class StarKeysMigrationTests(TestCase):
+    """0003 converts the JSON text tokens to binary Fernet, 0007 moves those to AES-GCM."""
+
+    def setUp(self):
+        self.fernet = legacy_fernet()
+        self.draw = make_draw()
+        self.ticket = ForgedKey.objects.create(
+            user_wallet=make_wallet('bob'), draw=self.draw,
+            serial_number='AK000100010001', star_keys=[1, 2, 3, 4, 5, 7],
+        )
+        # Put both rows back in the state 0003 leaves them in
+        for obj, keys in ((self.draw, [1, 2, 3, 4, 5, 6]), (self.ticket, [1, 2, 3, 4, 5, 7])):
+            row = SimpleNamespace(pk=obj.pk, star_keys=self.fernet.encrypt(json.dumps(keys).encode()).decode())
+            self.store_raw(obj, migration_0003._convert(self.fernet, type(obj), row))
+
+    def store_raw(self, obj, token):
+        # update() skips pre_save, so the token lands in the column unchanged
+        type(obj).objects.filter(pk=obj.pk).update(star_keys=token)
+
+    def raw_token(self, model):
+        return bytes(model.objects.values_list('star_keys', flat=True).get())
+
+    def test_0003_stores_one_byte_per_key(self):
+        self.assertEqual(self.fernet.decrypt(self.raw_token(Draw)), bytes([1, 2, 3, 4, 5, 6]))
+        self.assertEqual(self.fernet.decrypt(self.raw_token(ForgedKey)), bytes([1, 2, 3, 4, 5, 7]))
+
+    def test_0003_aborts_on_undecryptable_row(self):
+        row = SimpleNamespace(pk=42, star_keys='garbage')
+        with self.assertRaisesMessage(ValueError, 'Draw id=42'):
+            migration_0003._convert(self.fernet, Draw, row)
+
+    def test_0007_output_reads_back_through_the_field(self):
+        migration_0007.fernet_to_aesgcm(apps, None)
+        self.assertEqual(Draw.objects.get().get_star_keys(), [1, 2, 3, 4, 5, 6])
+        self.assertEqual(ForgedKey.objects.get().get_star_keys(), [1, 2, 3, 4, 5, 7])
+
+    def test_0007_reverse_restores_fernet_tokens(self):
+        migration_0007.fernet_to_aesgcm(apps, None)
+        migration_0007.aesgcm_to_fernet(apps, None)
+        self.assertEqual(self.fernet.decrypt(self.raw_token(Draw)), bytes([1, 2, 3, 4, 5, 6]))
+        self.assertEqual(self.fernet.decrypt(self.raw_token(ForgedKey)), bytes([1, 2, 3, 4, 5, 7]))
+
+    def test_0007_aborts_on_undecryptable_row(self):
+        self.store_raw(self.ticket, b'not a fernet token')
+        with self.assertRaisesMessage(ValueError, f'ForgedKey id={self.ticket.pk}'):
+            migration_0007.fernet_to_aesgcm(apps, None)
+
+
+@skipUnless(redis_available(), 'Redis is not reachable')
+class FlushTicketCountsTests(TestCase):
+    def setUp(self):
+        self.conn = get_redis_connection('default')
+        self.draw = make_draw()
+        Draw.objects.filter(pk=self.draw.pk).update(total_tickets_sold=10)
+        self.conn.hdel(Draw.TICKET_COUNTS_KEY, self.draw.pk)
+        self.addCleanup(self.conn.hdel, Draw.TICKET_COUNTS_KEY, self.draw.pk)
+
+    def test_flush_applies_and_clears_buffered_deltas(self):
+        Draw.record_tickets_sold(self.draw.pk, 3)
+        Draw.record_tickets_sold(self.draw.pk, -1)
+        self.assertEqual(Draw.objects.get().live_tickets_sold, 12)
+        Draw.flush_ticket_counts()
+        self.assertEqual(Draw.objects.get().total_tickets_sold, 12)
+        self.assertIsNone(self.conn.hget(Draw.TICKET_COUNTS_KEY, self.draw.pk))
+        Draw.flush_ticket_counts()
+        self.assertEqual(Draw.objects.get().total_tickets_sold, 12)
+
+    def test_flush_never_goes_negative(self):
+        Draw.record_tickets_sold(self.draw.pk, -25)
+        Draw.flush_ticket_counts()
+        self.assertEqual(Draw.objects.get().total_tickets_sold, 0)
+
+    def test_failed_update_hands_the_delta_back(self):
+        Draw.record_tickets_sold(self.draw.pk, 5)
+        with mock.patch.object(Draw.objects, 'filter', side_effect=RuntimeError('db down')):
+            with self.assertRaises(RuntimeError):
+                Draw.flush_ticket_counts()
+        self.assertEqual(int(self.conn.hget(Draw.TICKET_COUNTS_KEY, self.draw.pk)), 5)
+        Draw.flush_ticket_counts()
+        self.assertEqual(Draw.objects.get().total_tickets_sold, 15)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class SubmitKeysTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.wallet = make_wallet('carol')
+        self.draw = make_draw()
+        self.url = reverse('submit_keys', args=[self.draw.pk])
+        self.client.force_login(self.wallet.user)
+
+    def submit(self, keys):
+        return self.client.post(self.url, json.dumps({'star_keys': keys}), content_type='application/json').json()
+
+    def test_first_submission_is_saved(self):
+        body = self.submit([1, 2, 3, 4, 5, 6])
+        self.assertTrue(body['success'])
+        ticket = ForgedKey.objects.get()
+        self.assertEqual(ticket.serial_number, body['serial_number'])
+        self.assertEqual(ticket.get_star_keys(), [1, 2, 3, 4, 5, 6])
+        self.assertEqual(ticket.username_snapshot, 'carol')
+
+    def test_second_submission_is_rejected(self):
+        self.assertTrue(self.submit([1, 2, 3, 4, 5, 6])['success'])
+        body = self.submit([6, 5, 4, 3, 2, 1])
+        self.assertEqual(body, {'success': False, 'error': 'Already submitted'})
+        self.assertEqual(ForgedKey.objects.get().get_star_keys(), [1, 2, 3, 4, 5, 6])
+
+    def test_other_integrity_errors_are_not_reported_as_duplicates(self):
+        other = make_wallet('dave')
+        serial = ForgedKey.make_serial_number(self.draw.pk, self.wallet.pk, 1)
+        ForgedKey.objects.create(user_wallet=other, draw=self.draw, serial_number=serial, star_keys=[0] * 6)
+        with mock.patch.object(ForgedKey, 'reserve_serial_sequences', return_value=1):
+            body = self.submit([1, 2, 3, 4, 5, 6])
+        self.assertEqual(body, {'success': False, 'error': 'Submission failed'})
+        self.assertFalse(ForgedKey.objects.filter(user_wallet=self.wallet).exists())
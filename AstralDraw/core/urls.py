@@ -1,7 +1,17 @@
 # core/urls.py
-from django.urls import path
+from django.urls import path, include
 from . import views
 
+# API URLs (JSON endpoints), resolved behind a single 'api/' prefix
+api_patterns = [
+    path('draws/<int:draw_id>/', views.draw_detail, name='api_draw_detail'),
+    path('my-keys/', views.user_keys, name='api_user_keys'),
+    path('platform-stats/', views.platform_stats, name='api_platform_stats'),
+    path('draws/<int:draw_id>/submit-keys/', views.submit_keys, name='api_submit_keys'),
+    path('draws/create/', views.create_draw, name='api_create_draw'),
+    path('draws/<int:draw_id>/process/', views.process_draw, name='api_process_draw'),
+]
+
 urlpatterns = [
     # Authentication URLs
     path('', views.landing, name='landing'),
@@ -25,11 +35,5 @@ urlpatterns = [
     path('my-keys/', views.user_keys, name='user_keys'),
     path('platform-stats/', views.platform_stats, name='platform_stats'),
     
-    # API URLs (JSON endpoints)
-    path('api/draws/<int:draw_id>/', views.draw_detail, name='api_draw_detail'),
-    path('api/my-keys/', views.user_keys, name='api_user_keys'),
-    path('api/platform-stats/', views.platform_stats, name='api_platform_stats'),
-    path('api/draws/<int:draw_id>/submit-keys/', views.submit_keys, name='api_submit_keys'),
-    path('api/draws/create/', views.create_draw, name='api_create_draw'),
-    path('api/draws/<int:draw_id>/process/', views.process_draw, name='api_process_draw'),
+    path('api/', include(api_patterns)),
 ]
\ No newline at end of file
@@ -1,21 +1,30 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth import authenticate, login, logout
+from django.contrib.auth import login, logout
 from django.contrib.auth.models import User
-from django.http import JsonResponse
+from django.http import HttpResponse, Http404
 from django.contrib import messages
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import require_http_methods, condition
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
-from django.db.models import Sum, Count, Q
+from django.db.models import Sum, Count, Max, Q, F, Func, Subquery
 from django.core.cache import cache
 from django.views.decorators.cache import cache_page
-from django.db import transaction  # Fixed import
+from django.db import transaction, IntegrityError  # Fixed import
+from decimal import Decimal
+import hashlib
 import json
+import orjson
 import string
 import random
 import logging
 
-from core.models import UserWallet, Draw, ForgedKey  # Fixed import
+from core.models import UserWallet, Draw, ForgedKey, star_keys_mask  # Fixed import
+from core.caching import (
+    email_maybe_registered, authenticate_cached,
+    draw_accepts_submissions, can_participate_cache_key, load_platform_stats, store_platform_stats,
+    platform_stats_etag, get_user_wallet_id, LANDING_PAGE_KEY, LANDING_ETAG_KEY,
+)
+from core.tasks import invalidate_user_caches, invalidate_platform_caches, delay_or_run
 from hiero.utils import create_new_account
 from hiero.ft import associate_token
 
@@ -24,8 +33,29 @@ logger = logging.getLogger(__name__)
 # Cache timeouts (in seconds)
 CACHE_TIMEOUT_SHORT = 300  # 5 minutes
 CACHE_TIMEOUT_LONG = 1800  # 30 minutes
+CACHE_TIMEOUT_DAY = 86400  # 24 hours
+EMAIL_LOCK_TIMEOUT = 30
 
-def id_generator(size=8, chars=string.ascii_uppercase + string.digits):
+def _orjson_default(obj):
+    # orjson has no Decimal support; match DjangoJSONEncoder's string output
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError
+
+
+class ORJSONResponse(HttpResponse):
+    """JSON response serialized with orjson instead of the stdlib encoder"""
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(
+            orjson.dumps(data, default=_orjson_default, option=orjson.OPT_UTC_Z | orjson.OPT_NAIVE_UTC),
+            **kwargs
+        )
+
+# Built once at import instead of on every call
+_ALPHABET = string.ascii_uppercase + string.digits
+
+def id_generator(size=8, chars=_ALPHABET):
     """Optimized random string generator"""
     return ''.join(random.choices(chars, k=size))
 
@@ -67,14 +97,20 @@ def register_view(request):
         
         email = post_data['email'].lower().strip()  # Normalize email
         
-        # Cache user existence check
-        cache_key = f"user_exists_{email}"
-        if cache.get(cache_key) or User.objects.filter(email=email).exists():
-            cache.set(cache_key, True, 300)
-            messages.warning(request, "User with this email already exists")
+        # Reserve the email first so concurrent submissions cannot both pass the check below
+        lock_key = f"email_lock_{email}"
+        if not cache.add(lock_key, 1, EMAIL_LOCK_TIMEOUT):
+            messages.warning(request, "Registration for this email is already in progress")
             return redirect('register')
         
         try:
+            # Bloom filter miss proves the email is new; only possible hits reach the cache/DB
+            cache_key = f"user_exists_{email}"
+            if email_maybe_registered(email) and (cache.get(cache_key) or User.objects.filter(email=email).exists()):
+                cache.set(cache_key, True, 300)
+                messages.warning(request, "User with this email already exists")
+                return redirect('register')
+            
             # Create wallet first (more expensive operation)
             wallet_response = assign_user_wallet(name=f"{post_data['first_name']} {post_data['last_name']}")
             
@@ -99,8 +135,8 @@ def register_view(request):
                     recipient_id=wallet_response['recipient_id']
                 )
             
-            # Cache the new user
-            cache.set(cache_key, True, 300)
+            # Cache the new user; the User post_save signal adds it to the bloom filter
+            cache.set(cache_key, True, CACHE_TIMEOUT_DAY)
             messages.success(request, "Account created successfully")
             return redirect('login')
             
@@ -108,6 +144,8 @@ def register_view(request):
             logger.error(f"Registration error: {e}")
             messages.warning(request, "Registration failed")
             return redirect('register')
+        finally:
+            cache.delete(lock_key)
     
     return render(request, 'accounts/register.html')
 
@@ -133,21 +171,18 @@ def login_view(request):
             messages.warning(request, "Too many failed attempts. Try again later.")
             return redirect('login')
         
-        # Authenticate using username (which is email)
-        user = authenticate(request, username=email, password=password)
+        # Authenticate using username (which is email); repeat logins skip the User SELECT
+        user = authenticate_cached(request, email, password)
         
         if user is not None:
-            # Prefetch related data in one query
-            wallet = UserWallet.objects.only('id').filter(user=user).first()
-            if not wallet:
+            # EXISTS on the unique user_id index; the wallet id is cached by the views that need it
+            if not UserWallet.objects.filter(user_id=user.pk).exists():
                 messages.warning(request, "Wallet not found")
                 return redirect('login')
             
             login(request, user)
-            cache.delete(fail_key)  # Clear fail counter
-            
-            # Cache user session data
-            cache.set(f"user_{user.id}_wallet", wallet.id, 3600)
+            if fail_count:
+                cache.delete(fail_key)  # Clear fail counter; skip the DEL when none was recorded
             messages.success(request, f"Welcome back, {user.first_name}!")
             return redirect('dashboard')
         else:
@@ -161,23 +196,28 @@ def logout_view(request):
     """Optimized logout with cache cleanup"""
     user_id = request.user.id
     logout(request)
-    # Cleanup user-specific cache
-    cache.delete_many([f"user_{user_id}_wallet", f"user_{user_id}_keys"])
+    # Cleanup user-specific cache in the background
+    delay_or_run(invalidate_user_caches, user_id)
     return redirect("login")
 
+def landing_etag(request):
+    # Set when the landing context is rebuilt, and cleared with it
+    return cache.get(LANDING_ETAG_KEY)
+
+@condition(etag_func=landing_etag)
 @cache_page(300)  # Cache for 5 minutes
 def landing(request):
     """Optimized landing page with selective field loading"""
-    cache_key = "landing_page_data"
+    cache_key = LANDING_PAGE_KEY
     cached_data = cache.get(cache_key)
     
     if cached_data:
         return render(request, 'landing.html', cached_data)
     
     # Use only() to load only necessary fields
-    active_draws = Draw.objects.filter(
+    active_draws = Draw.objects.list_summary().filter(
         status__in=[Draw.DrawStatus.UPCOMING, Draw.DrawStatus.ACTIVE]
-    ).only('id', 'title', 'prize_pool', 'draw_datetime').order_by('draw_datetime')[:3]
+    ).order_by('draw_datetime')[:3]
     
     recent_winners = Draw.objects.filter(
         status=Draw.DrawStatus.ENDED,
@@ -186,12 +226,16 @@ def landing(request):
         'title', 'prize_pool', 'draw_datetime', 'winner_wallet__user__first_name'
     )[:5]
     
-    # Use aggregate with specific fields
+    # Fold the wallet count into the draw aggregate as a scalar subquery:
+    # one round-trip instead of two
+    wallet_count = UserWallet.objects.order_by().annotate(c=Func('id', function='COUNT')).values('c')
     stats = Draw.objects.aggregate(
         total_draws=Count('id'),
-        total_prizes=Sum('prize_pool')
+        total_prizes=Sum('prize_pool'),
+        active_players=Max(Subquery(wallet_count)),
     )
-    stats['active_players'] = UserWallet.objects.count()
+    if stats['active_players'] is None:  # No draw rows to aggregate over
+        stats['active_players'] = UserWallet.objects.count()
     
     context = {
         'active_draws': active_draws,
@@ -200,7 +244,9 @@ def landing(request):
     }
     
     cache.set(cache_key, context, 300)
-    return render(request, 'landing.html', context)
+    response = render(request, 'landing.html', context)
+    cache.set(LANDING_ETAG_KEY, hashlib.md5(response.content).hexdigest(), 300)
+    return response
 
 @login_required
 def dashboard(request):
@@ -226,15 +272,15 @@ def dashboard(request):
     ).order_by('-created_at')[:10]
     
     # Active draws user can participate in
-    active_draws = Draw.objects.filter(
+    active_draws = Draw.objects.list_summary().filter(
         status__in=[Draw.DrawStatus.UPCOMING, Draw.DrawStatus.ACTIVE],
         draw_datetime__gt=timezone.now()
-    ).only('id', 'title', 'prize_pool', 'draw_datetime').order_by('draw_datetime')[:10]
+    ).order_by('draw_datetime')[:10]
     
     # User's winning history
-    user_wins = Draw.objects.filter(
+    user_wins = Draw.objects.list_summary().filter(
         winner_wallet=user_wallet
-    ).only('title', 'prize_pool', 'draw_datetime').order_by('-draw_datetime')[:5]
+    ).order_by('-draw_datetime')[:5]
     
     context = {
         'user_wallet': user_wallet,
@@ -252,51 +298,45 @@ def dashboard(request):
 def submit_keys(request, draw_id):
     """Optimized key submission with transaction"""
     try:
-        draw = get_object_or_404(Draw.objects.only('id', 'status', 'draw_datetime'), id=draw_id)
-        
-        if not draw.can_participate():
-            return JsonResponse({'success': False, 'error': 'Draw not accepting submissions'})
+        if not draw_accepts_submissions(draw_id):
+            return ORJSONResponse({'success': False, 'error': 'Draw not accepting submissions'})
         
         data = json.loads(request.body)
         star_keys = data.get('star_keys', [])
         
         # Fast validation
         if len(star_keys) != 6 or not all(isinstance(k, int) and 0 <= k <= 9 for k in star_keys):
-            return JsonResponse({'success': False, 'error': 'Invalid keys format'})
+            return ORJSONResponse({'success': False, 'error': 'Invalid keys format'})
         
-        user_wallet_id = cache.get(f"user_{request.user.id}_wallet")
-        if not user_wallet_id:
-            user_wallet = get_object_or_404(UserWallet, user=request.user)
-            user_wallet_id = user_wallet.id
-            cache.set(f"user_{request.user.id}_wallet", user_wallet_id, 3600)
+        user_wallet_id = get_user_wallet_id(request.user)
         
-        # Check existing submission using exists() for speed
-        if ForgedKey.objects.filter(user_wallet_id=user_wallet_id, draw_id=draw_id).exists():
-            return JsonResponse({'success': False, 'error': 'Already submitted'})
+        # Allocate the serial from Redis outside the transaction so no DB lock is held
+        next_serial = ForgedKey.reserve_serial_sequences(draw_id)
+        serial_number = ForgedKey.make_serial_number(draw_id, user_wallet_id, next_serial)
         
-        with transaction.atomic():
-            # Generate serial number efficiently
-            next_serial = ForgedKey.objects.filter(draw_id=draw_id).count() + 1
-            serial_number = f"AK{draw_id:04d}{user_wallet_id:04d}{next_serial:04d}"
-            
-            # Create forged key
-            forged_key = ForgedKey.objects.create(
-                user_wallet_id=user_wallet_id,
-                draw_id=draw_id,
-                serial_number=serial_number
-            )
-            forged_key.set_star_keys(star_keys)
-            
-            # Update draw count using F() expression
-            from django.db.models import F
-            Draw.objects.filter(id=draw_id).update(
-                total_tickets_sold=F('total_tickets_sold') + 1
-            )
+        # The (user_wallet, draw) unique constraint rejects repeat submissions,
+        # so a single INSERT replaces the exists() pre-check
+        try:
+            with transaction.atomic():
+                # Create forged key
+                # save() derives the mask and the field encrypts the list in this INSERT
+                ForgedKey.objects.create(
+                    user_wallet_id=user_wallet_id,
+                    draw_id=draw_id,
+                    serial_number=serial_number,
+                    star_keys=star_keys,
+                    # Known from the request; spares save() the username lookup
+                    username_snapshot=request.user.username
+                )
+        except IntegrityError:
+            if ForgedKey.objects.filter(user_wallet_id=user_wallet_id, draw_id=draw_id).exists():
+                return ORJSONResponse({'success': False, 'error': 'Already submitted'})
+            raise
         
         # Invalidate relevant caches
         cache.delete_many([f"dashboard_{request.user.id}", f"user_{request.user.id}_keys"])
         
-        return JsonResponse({
+        return ORJSONResponse({
             'success': True,
             'serial_number': serial_number,
             'message': 'Keys submitted successfully!'
@@ -304,14 +344,14 @@ def submit_keys(request, draw_id):
         
     except Exception as e:
         logger.error(f"Key submission error: {e}")
-        return JsonResponse({'success': False, 'error': 'Submission failed'})
+        return ORJSONResponse({'success': False, 'error': 'Submission failed'})
 
 @login_required
 @require_http_methods(["POST"])
 def create_draw(request):
     """Admin view to create new draws"""
     if not request.user.is_staff:
-        return JsonResponse({
+        return ORJSONResponse({
             'success': False,
             'error': 'Admin access required'
         })
@@ -322,7 +362,7 @@ def create_draw(request):
         # Validate required fields
         required_fields = ['title', 'prize_pool', 'draw_datetime']
         if not all(field in data for field in required_fields):
-            return JsonResponse({
+            return ORJSONResponse({
                 'success': False,
                 'error': 'Missing required fields'
             })
@@ -330,20 +370,19 @@ def create_draw(request):
         # Generate winning star keys (6 random numbers 0-9)
         winning_keys = [random.randint(0, 9) for _ in range(6)]
         
-        # Create draw
+        # Create draw; the star keys field encrypts the list within this INSERT
         draw = Draw.objects.create(
             title=data['title'],
             prize_pool=data['prize_pool'],
             draw_datetime=data['draw_datetime'],
-            status=Draw.DrawStatus.UPCOMING
+            status=Draw.DrawStatus.UPCOMING,
+            star_keys=winning_keys
         )
-        draw.set_star_keys(winning_keys)
-        draw.save()
         
-        # Clear relevant caches
-        cache.delete_many(["platform_stats", "landing_page_data"])
+        # Clear relevant caches in the background
+        delay_or_run(invalidate_platform_caches, can_participate_cache_key(draw.id))
         
-        return JsonResponse({
+        return ORJSONResponse({
             'success': True,
             'draw_id': draw.id,
             'draw_title': draw.title,
@@ -351,7 +390,7 @@ def create_draw(request):
         })
         
     except Exception as e:
-        return JsonResponse({
+        return ORJSONResponse({
             'success': False,
             'error': str(e)
         })
@@ -360,8 +399,10 @@ def create_draw(request):
 @login_required
 def draw_detail(request, draw_id):
     """Optimized draw detail with field selection"""
-    draw = get_object_or_404(Draw.objects.only(
-        'id', 'title', 'status', 'prize_pool', 'draw_datetime', 'total_tickets_sold', 'winner_wallet_id', 'winning_ticket_serial'
+    # Winner username and winning keys come back in the same row (LEFT JOINs on the nullable winner)
+    draw = get_object_or_404(Draw.objects.select_related('winner_wallet__user').only(
+        'id', 'title', 'status', 'prize_pool', 'draw_datetime', 'total_tickets_sold', 'star_keys',
+        'winning_ticket_serial', 'winner_wallet__user__username'
     ), id=draw_id)
     
     draw_data = {
@@ -370,23 +411,19 @@ def draw_detail(request, draw_id):
         'status': draw.status,
         'prize_pool': float(draw.prize_pool),
         'draw_datetime': draw.draw_datetime,
-        'total_tickets_sold': draw.total_tickets_sold,
+        'total_tickets_sold': draw.live_tickets_sold,
         'can_participate': draw.can_participate(),
     }
     
     if draw.status == Draw.DrawStatus.ENDED:
         draw_data['winning_keys'] = draw.get_star_keys()
         if draw.winner_wallet_id:
-            # Efficiently get winner username
-            winner_username = User.objects.filter(
-                userwallet__id=draw.winner_wallet_id
-            ).values_list('username', flat=True).first()
             draw_data['winner'] = {
-                'username': winner_username,
+                'username': draw.winner_wallet.user.username,
                 'ticket_serial': draw.winning_ticket_serial
             }
     
-    return JsonResponse({'draw': draw_data})
+    return ORJSONResponse({'draw': draw_data})
 
 @login_required
 def user_keys(request):
@@ -395,62 +432,51 @@ def user_keys(request):
     cached_keys = cache.get(cache_key)
     
     if cached_keys:
-        return JsonResponse({'keys': cached_keys})
+        return ORJSONResponse({'keys': cached_keys})
     
-    user_wallet = get_object_or_404(UserWallet, user=request.user)
+    try:
+        user_wallet_id = get_user_wallet_id(request.user)
+    except UserWallet.DoesNotExist:
+        raise Http404("No wallet for this user")
+    # Pull the draw columns needed for winner/match checks in the same query,
+    # so the loop never touches key.draw or the deferred star_keys column
     keys = ForgedKey.objects.filter(
-        user_wallet=user_wallet
-    ).select_related('draw').only(
-        'id', 'serial_number', 'created_at', 'nft_metadata',
-        'draw__title', 'draw__status'
+        user_wallet_id=user_wallet_id
+    ).annotate(
+        draw_title=F('draw__title'),
+        draw_status=F('draw__status'),
+        winner_serial=F('draw__winning_ticket_serial'),
+        draw_star_keys=F('draw__star_keys'),
+    ).only(
+        'id', 'serial_number', 'created_at', 'star_keys_mask'
     ).order_by('-created_at')[:50]  # Limit results
     
+    star_keys_field = Draw._meta.get_field('star_keys')
     keys_data = []
     for key in keys:
+        ended = key.draw_status == Draw.DrawStatus.ENDED
+        match_count = None
+        if ended:
+            winning_mask = star_keys_mask(star_keys_field.decrypt(key.draw_star_keys))
+            match_count = (key.star_keys_mask & winning_mask).bit_count()
         keys_data.append({
             'id': key.id,
             'serial_number': key.serial_number,
-            'draw_title': key.draw.title,
-            'draw_status': key.draw.status,
+            'draw_title': key.draw_title,
+            'draw_status': key.draw_status,
             'created_at': key.created_at,
-            'is_winner': key.is_winner(),
-            'match_count': key.get_match_count() if key.draw.status == Draw.DrawStatus.ENDED else None,
+            'is_winner': ended and key.serial_number == key.winner_serial,
+            'match_count': match_count,
         })
     
     cache.set(cache_key, keys_data, 300)
-    return JsonResponse({'keys': keys_data})
+    return ORJSONResponse({'keys': keys_data})
 
-@cache_page(600)  # Cache for 10 minutes
+@condition(etag_func=lambda request: platform_stats_etag())
 def platform_stats(request):
-    """Optimized platform stats with caching"""
-    cache_key = "platform_stats"
-    cached_stats = cache.get(cache_key)
-    
-    if cached_stats:
-        return JsonResponse(cached_stats)
-    
-    # Single query for all stats
-    stats = {
-        'total_draws': Draw.objects.count(),
-        'active_draws': Draw.objects.filter(
-            status__in=[Draw.DrawStatus.UPCOMING, Draw.DrawStatus.ACTIVE]
-        ).count(),
-        'total_prizes': float(Draw.objects.aggregate(Sum('prize_pool'))['prize_pool__sum'] or 0),
-        'total_players': UserWallet.objects.count(),
-        'keys_forged': ForgedKey.objects.count(),
-    }
-    
-    # Recent winners with efficient query
-    recent_winners = list(Draw.objects.filter(
-        status=Draw.DrawStatus.ENDED,
-        winner_wallet__isnull=False
-    ).select_related('winner_wallet__user').values(
-        'title', 'prize_pool', 'draw_datetime', 'winner_wallet__user__username'
-    )[:5])
-    
-    result = {'stats': stats, 'recent_winners': recent_winners}
-    cache.set(cache_key, result, 600)
-    return JsonResponse(result)
+    """Platform stats served from the Redis hash the beat task maintains"""
+    result = load_platform_stats() or store_platform_stats()
+    return ORJSONResponse(result)
 
 # Batch processing optimization for admin functions
 @login_required
@@ -458,37 +484,36 @@ def platform_stats(request):
 def process_draw(request, draw_id):
     """Optimized draw processing with bulk operations"""
     if not request.user.is_staff:
-        return JsonResponse({'success': False, 'error': 'Admin access required'})
+        return ORJSONResponse({'success': False, 'error': 'Admin access required'})
     
     try:
-        draw = get_object_or_404(Draw, id=draw_id)
-        
-        if draw.status != Draw.DrawStatus.ACTIVE or draw.draw_datetime > timezone.now():
-            return JsonResponse({'success': False, 'error': 'Draw cannot be processed'})
-        
-        # Find winner
-        winner = draw.map_winner()
-        
         with transaction.atomic():
+            # The guarded UPDATE checks and ends the draw in one statement, so
+            # two concurrent requests cannot both process it
+            ended = Draw.objects.filter(
+                id=draw_id,
+                status=Draw.DrawStatus.ACTIVE,
+                draw_datetime__lte=timezone.now()
+            ).update(status=Draw.DrawStatus.ENDED)
+            
+            if not ended:
+                return ORJSONResponse({'success': False, 'error': 'Draw cannot be processed'})
+            
+            # Find winner; map_winner records the winning wallet and serial
+            draw = Draw.objects.only('id', 'prize_pool', 'star_keys').get(id=draw_id)
+            winner = draw.map_winner()
+            
             if winner:
-                prize_amount = draw.prize_pool * 0.7
-                # Update draw in single query
-                Draw.objects.filter(id=draw_id).update(
-                    total_prize_distributed=prize_amount,
-                    status=Draw.DrawStatus.ENDED,
-                    winner_wallet=winner.user_wallet,
-                    winning_ticket_serial=winner.serial_number
-                )
-            else:
-                Draw.objects.filter(id=draw_id).update(status=Draw.DrawStatus.ENDED)
+                prize_amount = draw.prize_pool * Decimal('0.7')
+                Draw.objects.filter(id=draw_id).update(total_prize_distributed=prize_amount)
         
-        # Clear relevant caches
-        cache.delete_many(["platform_stats", "landing_page_data"])
+        # Clear relevant caches in the background
+        delay_or_run(invalidate_platform_caches, Draw.stats_cache_key(draw_id), can_participate_cache_key(draw_id))
         
-        return JsonResponse({
+        return ORJSONResponse({
             'success': True,
             'winner': {
-                'username': winner.user_wallet.user.username,
+                'username': winner.username_snapshot,
                 'serial_number': winner.serial_number,
                 'prize_amount': float(prize_amount)
             } if winner else None,
@@ -497,7 +522,7 @@ def process_draw(request, draw_id):
         
     except Exception as e:
         logger.error(f"Draw processing error: {e}")
-        return JsonResponse({'success': False, 'error': str(e)})
+        return ORJSONResponse({'success': False, 'error': str(e)})
     
 def faqs(request):
     return render(request, 'faqs.html')
\ No newline at end of file